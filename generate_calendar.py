@@ -4,28 +4,31 @@ Generate ICS calendar file from NASCAR schedule data.
 Import the generated .ics file into Google Calendar.
 """
 
-import json
+import orjson
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-import hashlib
+import zlib
 
 
 def generate_uid(race_id: int, series: str) -> str:
     """Generate a unique ID for the calendar event."""
-    unique_string = f"{race_id}-{series}"
-    return hashlib.md5(unique_string.encode()).hexdigest()[:16] + "@nascar-scraper"
+    # crc32 is plenty: race_id is already unique per series
+    return f"{race_id}-{zlib.crc32(series.encode()):08x}@nascar-scraper"
+
+
+# Translation table for ICS text escaping (backslashes, semicolons, commas, newlines)
+_ICS_ESCAPE = str.maketrans({"\\": "\\\\", ";": "\\;", ",": "\\,", "\n": "\\n"})
+_ICS_SPECIALS = frozenset("\\;,\n")
 
 
 def escape_ics_text(text: str) -> str:
     """Escape special characters for ICS format."""
     if not text:
         return ""
-    # Escape backslashes, semicolons, commas, and newlines
-    text = text.replace("\\", "\\\\")
-    text = text.replace(";", "\\;")
-    text = text.replace(",", "\\,")
-    text = text.replace("\n", "\\n")
-    return text
+    # Most fields contain no specials; return the original string untouched
+    if _ICS_SPECIALS.isdisjoint(text):
+        return text
+    return text.translate(_ICS_ESCAPE)
 
 
 def parse_race_datetime(date_str: str) -> datetime | None:
@@ -35,35 +38,43 @@ def parse_race_datetime(date_str: str) -> datetime | None:
 
     # Format: "2026-02-15T14:30:00-0500"
     try:
-        # Handle timezone offset format
-        if len(date_str) > 19:
-            # Parse with timezone
-            dt_str = date_str[:19]
-            tz_str = date_str[19:]
-            dt = datetime.strptime(dt_str, "%Y-%m-%dT%H:%M:%S")
-
-            # Parse timezone offset
-            if tz_str:
-                tz_sign = 1 if tz_str[0] == '+' else -1
-                tz_hours = int(tz_str[1:3])
-                tz_mins = int(tz_str[3:5]) if len(tz_str) >= 5 else 0
-                # Note: We'll store as UTC for ICS
-                offset = timedelta(hours=tz_hours, minutes=tz_mins) * tz_sign
-                dt = dt - offset  # Convert to UTC
-            return dt
-        else:
-            return datetime.strptime(date_str, "%Y-%m-%dT%H:%M:%S")
-    except (ValueError, IndexError):
+        # Normalize "-0500" -> "-05:00" for fromisoformat on Python < 3.11
+        if len(date_str) >= 24 and date_str[-5] in "+-" and date_str[-3] != ":":
+            date_str = date_str[:-2] + ":" + date_str[-2:]
+        dt = datetime.fromisoformat(date_str)
+        if dt.tzinfo is not None:
+            # Note: We'll store as UTC for ICS
+            dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+        return dt
+    except ValueError:
         return None
 
 
 def format_ics_datetime(dt: datetime) -> str:
     """Format datetime for ICS (UTC format)."""
-    return dt.strftime("%Y%m%dT%H%M%SZ")
-
-
-def create_ics_event(race: dict, series_name: str) -> str:
-    """Create a single VEVENT for a race."""
+    # Manual f-string formatting skips strftime's per-call format parse
+    return (
+        f"{dt.year:04d}{dt.month:02d}{dt.day:02d}"
+        f"T{dt.hour:02d}{dt.minute:02d}{dt.second:02d}Z"
+    )
+
+
+# One allocation per event: a single template formatted in one pass
+_EVENT_TMPL = (
+    "BEGIN:VEVENT\n"
+    "UID:{uid}\n"
+    "DTSTAMP:{dtstamp}\n"
+    "DTSTART:{dtstart}\n"
+    "DTEND:{dtend}\n"
+    "SUMMARY:{summary}\n"
+    "LOCATION:{location}\n"
+    "DESCRIPTION:{description}{url_line}\n"
+    "END:VEVENT"
+)
+
+
+def build_ics_event(race: dict, series_name: str, dtstamp: str) -> str | None:
+    """Build the VEVENT string for a race; returns None if the date is unparseable."""
     race_name = race.get("race_name", "NASCAR Race")
     track_name = race.get("track_name", "")
     state = race.get("state", "")
@@ -79,7 +90,7 @@ def create_ics_event(race: dict, series_name: str) -> str:
     # Parse datetime
     dt = parse_race_datetime(date_str)
     if not dt:
-        return ""
+        return None
 
     # Create end time (estimate 3-4 hours for a race)
     end_dt = dt + timedelta(hours=4)
@@ -111,72 +122,62 @@ def create_ics_event(race: dict, series_name: str) -> str:
     # Generate unique ID
     uid = generate_uid(race_id, series_name)
 
-    # Build VEVENT
-    event_lines = [
-        "BEGIN:VEVENT",
-        f"UID:{uid}",
-        f"DTSTAMP:{format_ics_datetime(datetime.now(timezone.utc))}",
-        f"DTSTART:{format_ics_datetime(dt)}",
-        f"DTEND:{format_ics_datetime(end_dt)}",
-        f"SUMMARY:{escape_ics_text(f'{race_name} ({series_name})')}",
-        f"LOCATION:{escape_ics_text(location)}",
-        f"DESCRIPTION:{description}",
-    ]
-
-    if race_url:
-        event_lines.append(f"URL:{race_url}")
-
-    event_lines.append("END:VEVENT")
-
-    return "\n".join(event_lines)
+    # Build VEVENT in one formatting pass
+    return _EVENT_TMPL.format_map({
+        "uid": uid,
+        "dtstamp": dtstamp,
+        "dtstart": format_ics_datetime(dt),
+        "dtend": format_ics_datetime(end_dt),
+        "summary": escape_ics_text(f"{race_name} ({series_name})"),
+        "location": escape_ics_text(location),
+        "description": description,
+        "url_line": f"\nURL:{race_url}" if race_url else "",
+    })
 
 
 def generate_ics_calendar(schedule_file: str, output_file: str) -> int:
     """Generate ICS calendar from NASCAR schedule JSON."""
 
     # Load schedule data
-    with open(schedule_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = orjson.loads(Path(schedule_file).read_bytes())
 
     # Get all races chronologically
     races = data.get("all_races_chronological", [])
 
-    # ICS header
-    ics_lines = [
-        "BEGIN:VCALENDAR",
-        "VERSION:2.0",
-        "PRODID:-//NASCAR Scraper//nascar-scraper//EN",
-        "CALSCALE:GREGORIAN",
-        "METHOD:PUBLISH",
-        "X-WR-CALNAME:2026 NASCAR Schedule",
-        "X-WR-TIMEZONE:America/New_York",
-    ]
+    # Dedup by (race_id, series) in one C-level pass, keeping the first
+    # occurrence of each key (some races appear in multiple series; the
+    # comprehension over the reversed list keeps the last seen, so reverse twice)
+    unique_races = list({
+        f"{race.get('race_id')}-{race.get('series', '')}": race
+        for race in reversed(races)
+    }.values())[::-1]
 
-    # Track events added (avoid duplicates by race_id)
-    added_events = set()
     event_count = 0
 
-    for race in races:
-        race_id = race.get("race_id")
-        series = race.get("series", "")
-
-        # Skip if we've already added this race (some races appear in multiple series)
-        event_key = f"{race_id}-{series}"
-        if event_key in added_events:
-            continue
-
-        event = create_ics_event(race, series)
-        if event:
-            ics_lines.append(event)
-            added_events.add(event_key)
-            event_count += 1
-
-    # ICS footer
-    ics_lines.append("END:VCALENDAR")
+    # Single DTSTAMP for the whole run (keeps output deterministic within a run)
+    dtstamp = format_ics_datetime(datetime.now(timezone.utc))
 
-    # Write ICS file
+    # Stream events to disk instead of materializing the whole calendar
     with open(output_file, "w", encoding="utf-8") as f:
-        f.write("\n".join(ics_lines))
+        f.write(
+            "BEGIN:VCALENDAR\n"
+            "VERSION:2.0\n"
+            "PRODID:-//NASCAR Scraper//nascar-scraper//EN\n"
+            "CALSCALE:GREGORIAN\n"
+            "METHOD:PUBLISH\n"
+            "X-WR-CALNAME:2026 NASCAR Schedule\n"
+            "X-WR-TIMEZONE:America/New_York\n"
+        )
+
+        for race in unique_races:
+            event = build_ics_event(race, race.get("series", ""), dtstamp)
+            if event:
+                event_count += 1
+                f.write(event)
+                f.write("\n")
+
+        # ICS footer
+        f.write("END:VCALENDAR")
 
     return event_count
 
@@ -5,10 +5,18 @@ Scrapes schedules for Cup Series, Xfinity Series, and Craftsman Truck Series
 Uses direct API endpoints discovered from the NASCAR website.
 """
 
+import argparse
 import asyncio
-import json
+import csv
+import operator
 from datetime import datetime
-from playwright.async_api import async_playwright
+from functools import partial
+from pathlib import Path
+
+import httpx
+import orjson
+
+from generate_calendar import parse_race_datetime
 
 # NASCAR API endpoints (discovered from website network traffic)
 # Series IDs: 1 = Cup Series, 2 = Xfinity Series, 3 = Craftsman Truck Series
@@ -31,98 +39,133 @@ SERIES_CONFIG = {
 }
 
 
-def clean_string(value) -> str:
-    """Clean string values - strip whitespace and handle None."""
-    if value is None:
-        return ""
-    return str(value).strip()
+# Shared browser fingerprint for both the httpx and Playwright paths
+_UA = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+_VIEWPORT = {"width": 1920, "height": 1080}
+
+
+# (output key, API key, clean) triples; clean=True means strip whitespace
+# and map None to ""
+_RACE_FIELDS = (
+    ("race_name", "Race_Name", True),
+    ("race_id", "Race_Id", False),
+    ("track_name", "Track_Name", True),
+    ("track_id", "Track_Id", False),
+    ("state", "Race_State", True),
+    ("date", "Race_Date", True),
+    ("date_plain", "Race_Date_Plain", True),
+    ("start_time", "Race_Start", True),
+    ("scheduled_laps", "Scheduled_Laps", False),
+    ("actual_laps", "Actual_Laps", False),
+    ("qualifying_date", "Qualifying_Date", True),
+    ("playoff_round", "Playoff_Round", True),
+    ("tv_network", "Race_TV", True),
+    ("radio", "Race_Radio", True),
+    ("streaming", "Race_Live_Stream", True),
+    ("in_car_camera", "Race_In_Car", True),
+    ("tickets_url", "Race_Tickets", True),
+    ("race_url", "Race_URL", True),
+    ("previous_winner", "Previous_Winner_Name", True),
+)
+
+_TRACK_FIELDS = (
+    ("track_id", "Track_Id", False),
+    ("track_name", "Track_Name", True),
+    ("alt_track_name", "Alt_Track_Name", True),
+    ("state", "Race_State", True),
+    ("track_page_url", "Track_Page_URL", True),
+    ("track_image_url", "Track_Image_URL", True),
+    ("track_background_image_url", "Track_Background_Image_URL", True),
+)
 
 
 def extract_race_info(race: dict) -> dict:
     """Extract relevant race information from API response."""
-    return {
-        "race_name": clean_string(race.get("Race_Name")),
-        "race_id": race.get("Race_Id"),
-        "track_name": clean_string(race.get("Track_Name")),
-        "track_id": race.get("Track_Id"),
-        "state": clean_string(race.get("Race_State")),
-        "date": clean_string(race.get("Race_Date")),
-        "date_plain": clean_string(race.get("Race_Date_Plain")),
-        "start_time": clean_string(race.get("Race_Start")),
-        "scheduled_laps": race.get("Scheduled_Laps"),
-        "actual_laps": race.get("Actual_Laps"),
-        "qualifying_date": clean_string(race.get("Qualifying_Date")),
-        "playoff_round": clean_string(race.get("Playoff_Round")),
-        "tv_network": clean_string(race.get("Race_TV")),
-        "radio": clean_string(race.get("Race_Radio")),
-        "streaming": clean_string(race.get("Race_Live_Stream")),
-        "in_car_camera": clean_string(race.get("Race_In_Car")),
-        "tickets_url": clean_string(race.get("Race_Tickets")),
-        "race_url": clean_string(race.get("Race_URL")),
-        "previous_winner": clean_string(race.get("Previous_Winner_Name")),
+    get = race.get
+    info = {
+        key: ("" if (v := get(src)) is None else str(v).strip()) if clean else get(src)
+        for key, src, clean in _RACE_FIELDS
     }
+    # Parsed once here and used as the chronological sort key;
+    # stripped again before the JSON dump
+    info["_sort_ts"] = parse_race_datetime(info["date"]) or datetime.max
+    return info
 
 
 def extract_track_info(race: dict) -> dict:
     """Extract track information from a race entry."""
+    get = race.get
     return {
-        "track_id": race.get("Track_Id"),
-        "track_name": clean_string(race.get("Track_Name")),
-        "alt_track_name": clean_string(race.get("Alt_Track_Name")),
-        "state": clean_string(race.get("Race_State")),
-        "track_page_url": clean_string(race.get("Track_Page_URL")),
-        "track_image_url": clean_string(race.get("Track_Image_URL")),
-        "track_background_image_url": clean_string(race.get("Track_Background_Image_URL")),
+        key: ("" if (v := get(src)) is None else str(v).strip()) if clean else get(src)
+        for key, src, clean in _TRACK_FIELDS
     }
 
 
-async def fetch_schedule_via_browser(series_key: str, config: dict) -> tuple[dict, list]:
-    """Fetch schedule data by intercepting API calls during page load."""
+async def fetch_schedule_via_api(client, series_key: str, config: dict) -> tuple[dict, list]:
+    """Fetch schedule data directly from the NASCAR JSON API."""
+    try:
+        response = await client.get(config["api_url"])
+        response.raise_for_status()
+        data = response.json()
+    except Exception as e:
+        print(f"  API fetch failed: {e}")
+        return None, []
+    return data, data.get("response", [])
+
+
+async def fetch_schedule_via_browser(context, series_key: str, config: dict) -> tuple[dict, list]:
+    """Fetch schedule data by intercepting API calls during page load.
+
+    Uses a page from the shared browser context so all series reuse one
+    Chromium process and its HTTP/TLS connection pool.
+    """
     api_url = config["api_url"]
     schedule_data = None
     raw_races = []
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context(
-            viewport={"width": 1920, "height": 1080},
-            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        )
-        page = await context.new_page()
-
-        async def handle_response(response):
-            nonlocal schedule_data, raw_races
-            if api_url in response.url:
-                try:
-                    data = await response.json()
-                    schedule_data = data
-                    if "response" in data:
-                        raw_races = data["response"]
-                except Exception:
-                    pass
-
-        page.on("response", handle_response)
-
-        # Navigate to trigger the API call
-        if "cup" in series_key:
-            web_url = "https://www.nascar.com/nascar-cup-series/2026/schedule/"
-        elif "xfinity" in series_key:
-            web_url = "https://www.nascar.com/nascar-xfinity-series/2026/schedule/"
-        else:
-            web_url = "https://www.nascar.com/nascar-craftsman-truck-series/2026/schedule/"
+    page = await context.new_page()
+
+    async def handle_response(response):
+        nonlocal schedule_data, raw_races
+        if api_url in response.url:
+            try:
+                data = await response.json()
+                schedule_data = data
+                if "response" in data:
+                    raw_races = data["response"]
+            except Exception:
+                pass
+
+    page.on("response", handle_response)
+
+    # Navigate to trigger the API call
+    if "cup" in series_key:
+        web_url = "https://www.nascar.com/nascar-cup-series/2026/schedule/"
+    elif "xfinity" in series_key:
+        web_url = "https://www.nascar.com/nascar-xfinity-series/2026/schedule/"
+    else:
+        web_url = "https://www.nascar.com/nascar-craftsman-truck-series/2026/schedule/"
+
+    try:
+        await page.goto(web_url, wait_until="domcontentloaded", timeout=30000)
+        await page.wait_for_timeout(5000)
+    except Exception as e:
+        print(f"  Page load issue (expected): {e}")
+
+    await page.close()
 
-        try:
-            await page.goto(web_url, wait_until="domcontentloaded", timeout=30000)
-            await page.wait_for_timeout(5000)
-        except Exception as e:
-            print(f"  Page load issue (expected): {e}")
+    return schedule_data, raw_races
 
-        await browser.close()
 
-    return schedule_data, raw_races
+async def fetch_one(fetch, series_key: str, config: dict) -> tuple[str, dict, list]:
+    """Fetch one series' schedule; returns (series_key, schedule_data, raw_races)."""
+    print(f"Fetching {config['name']}...")
+    print(f"  API: {config['api_url']}")
+    schedule_data, raw_races = await fetch(series_key, config)
+    return series_key, schedule_data, raw_races
 
 
-async def main():
+async def main(use_browser: bool = False):
     print("=" * 60)
     print("NASCAR Schedule Scraper")
     print(f"Timestamp: {datetime.now().isoformat()}")
@@ -132,11 +175,32 @@ async def main():
     all_races_flat = []
     all_tracks = {}  # Track ID -> track info
 
-    for series_key, config in SERIES_CONFIG.items():
-        print(f"\nFetching {config['name']}...")
-        print(f"  API: {config['api_url']}")
-
-        schedule_data, raw_races = await fetch_schedule_via_browser(series_key, config)
+    # The three series are independent I/O-bound fetches - run them in parallel.
+    # Default: hit the JSON API directly. --browser keeps the headless-Chromium
+    # interception path around in case the API grows anti-bot checks.
+    if use_browser:
+        from playwright.async_api import async_playwright
+
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            context = await browser.new_context(viewport=_VIEWPORT, user_agent=_UA)
+            try:
+                results = await asyncio.gather(
+                    *(fetch_one(partial(fetch_schedule_via_browser, context), series_key, config)
+                      for series_key, config in SERIES_CONFIG.items())
+                )
+            finally:
+                await browser.close()
+    else:
+        async with httpx.AsyncClient(headers={"User-Agent": _UA}, timeout=30.0) as client:
+            results = await asyncio.gather(
+                *(fetch_one(partial(fetch_schedule_via_api, client), series_key, config)
+                  for series_key, config in SERIES_CONFIG.items())
+            )
+
+    for series_key, schedule_data, raw_races in results:
+        config = SERIES_CONFIG[series_key]
+        print(f"\nProcessing {config['name']}...")
 
         if schedule_data and raw_races:
             races = [extract_race_info(race) for race in raw_races]
@@ -147,8 +211,8 @@ async def main():
                 if track_id and track_id not in all_tracks:
                     all_tracks[track_id] = extract_track_info(race)
 
-            # Sort by date
-            races.sort(key=lambda x: x["date_plain"])
+            # Sort by parsed date, not the human-readable string
+            races.sort(key=operator.itemgetter("_sort_ts"))
 
             all_schedules[series_key] = {
                 "series_name": config["name"],
@@ -157,12 +221,12 @@ async def main():
                 "races": races,
             }
 
-            # Add to flat list with series identifier
+            # Add to flat list with series identifier; the per-series list
+            # shares the same dicts, which downstream only reads
             for race in races:
-                race_with_series = race.copy()
-                race_with_series["series"] = config["name"]
-                race_with_series["series_key"] = series_key
-                all_races_flat.append(race_with_series)
+                race["series"] = config["name"]
+                race["series_key"] = series_key
+                all_races_flat.append(race)
 
             print(f"  Found {len(races)} races")
 
@@ -179,8 +243,13 @@ async def main():
                 "error": "Failed to fetch data",
             }
 
-    # Sort flat list by date
-    all_races_flat.sort(key=lambda x: x["date_plain"])
+    # Sort flat list by parsed date
+    all_races_flat.sort(key=operator.itemgetter("_sort_ts"))
+
+    # Strip the sort-only field before dumping (the per-series lists share
+    # these same dicts)
+    for race in all_races_flat:
+        race.pop("_sort_ts", None)
 
     # Convert tracks dict to sorted list
     tracks_list = sorted(all_tracks.values(), key=lambda x: x["track_name"])
@@ -194,8 +263,7 @@ async def main():
     }
 
     output_file = "nascar_schedules_2026.json"
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    Path(output_file).write_bytes(orjson.dumps(output, option=orjson.OPT_INDENT_2))
     print(f"\n{'=' * 60}")
     print(f"Saved detailed schedule to: {output_file}")
 
@@ -206,37 +274,32 @@ async def main():
         "tracks": tracks_list,
     }
     tracks_file = "nascar_tracks_2026.json"
-    with open(tracks_file, "w", encoding="utf-8") as f:
-        json.dump(tracks_output, f, indent=2, ensure_ascii=False)
+    Path(tracks_file).write_bytes(orjson.dumps(tracks_output, option=orjson.OPT_INDENT_2))
     print(f"Saved tracks data to: {tracks_file}")
 
-    # Save a human-readable CSV
+    # Save a human-readable CSV (csv module handles quoting/escaping in C)
     csv_file = "nascar_schedules_2026.csv"
-    with open(csv_file, "w", encoding="utf-8") as f:
-        f.write("Series,Date,Race Name,Track,State,Start Time,Laps,TV,Streaming,Previous Winner\n")
-        for race in all_races_flat:
-            # Escape commas and quotes in fields for proper CSV
-            def escape_csv(val):
-                if val is None:
-                    return ""
-                val = str(val).replace('"', '""')
-                if ',' in val or '"' in val or '\n' in val:
-                    return f'"{val}"'
-                return val
-
-            row = [
-                escape_csv(race.get("series", "")),
-                escape_csv(race.get("date_plain", "")),
-                escape_csv(race.get("race_name", "")),
-                escape_csv(race.get("track_name", "")),
-                escape_csv(race.get("state", "")),
-                escape_csv(race.get("start_time", "")),
-                escape_csv(race.get("scheduled_laps")),
-                escape_csv(race.get("tv_network", "")),
-                escape_csv(race.get("streaming", "")),
-                escape_csv(race.get("previous_winner", "")),
-            ]
-            f.write(",".join(row) + "\n")
+    with open(csv_file, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            ["Series", "Date", "Race Name", "Track", "State", "Start Time",
+             "Laps", "TV", "Streaming", "Previous Winner"]
+        )
+        writer.writerows(
+            (
+                race.get("series", ""),
+                race.get("date_plain", ""),
+                race.get("race_name", ""),
+                race.get("track_name", ""),
+                race.get("state", ""),
+                race.get("start_time", ""),
+                race.get("scheduled_laps"),
+                race.get("tv_network", ""),
+                race.get("streaming", ""),
+                race.get("previous_winner", ""),
+            )
+            for race in all_races_flat
+        )
     print(f"Saved CSV schedule to: {csv_file}")
 
     # Summary
@@ -251,4 +314,11 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Scrape NASCAR schedules")
+    parser.add_argument(
+        "--browser",
+        action="store_true",
+        help="fetch via headless Chromium instead of the JSON API (requires playwright)",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(use_browser=args.browser))